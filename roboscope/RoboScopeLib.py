@@ -1,10 +1,13 @@
-from enum import Enum  # noqa: N999
+import re  # noqa: N999
+from enum import Enum
+from functools import lru_cache
 
-from matplotlib.ticker import EngFormatter
+import numpy as np
 from robot.api import logger
 from robot.api.deco import keyword, library
+from robot.libraries.BuiltIn import BuiltIn, RobotNotRunningError
 
-from roboscope.database import Database
+from roboscope.database import get_database
 from roboscope.models import BooleanMeasurement, MeasurementRecord, NumericMeasurement, SeriesMeasurement, StringMeasurement
 
 
@@ -15,6 +18,29 @@ class StringComparisonMode(str, Enum):
     REGEX = "regex"
 
 
+@lru_cache(maxsize=1)
+def _eng_formatter():
+    # matplotlib is only needed to format failed numeric checks, so import it on first use
+    from matplotlib.ticker import EngFormatter
+
+    return EngFormatter()
+
+
+@lru_cache(maxsize=1024)
+def _compiled(pattern: str, flags: int) -> re.Pattern:
+    return re.compile(pattern, flags)
+
+
+def _limits_array(limits: list[float] | None, size: int, fill: float) -> np.ndarray:
+    """
+    Convert per-index limits to an array of `size` elements, padding missing entries with `fill`.
+    """
+    if not limits:
+        return np.full(size, fill)
+    limits = np.asarray(limits[:size], dtype=np.float64)
+    return np.pad(limits, (0, size - limits.size), constant_values=fill)
+
+
 @library(scope="GLOBAL", version="0.1.0")
 class RoboScopeLib:
     """Robot Framework library for validating and recording measurements to RoboScope."""
@@ -23,8 +49,14 @@ class RoboScopeLib:
         self.db = None
 
     @keyword("Connect To RoboScope Database")
-    def connect_to_database(self):
-        self.db = Database()
+    def connect_to_database(self, db_url: str | None = None):
+        if db_url is None:
+            # Same variable as the listener, so both share the database of the current run
+            try:
+                db_url = BuiltIn().get_variable_value("${RBS_DB_URL}", default="sqlite:///results.db")
+            except RobotNotRunningError:
+                db_url = "sqlite:///results.db"
+        self.db = get_database(db_url)
 
     def _record_measurement(self, measurement: MeasurementRecord):
         if self.db:
@@ -61,8 +93,13 @@ class RoboScopeLib:
         )
         self._record_measurement(measurement)
 
+        lower = lower_limit if lower_limit is not None else float("-inf")
+        upper = upper_limit if upper_limit is not None else float("inf")
+        if lower <= value <= upper:
+            return
+
         if unit:
-            formatter = EngFormatter()
+            formatter = _eng_formatter()
             lower_limit_str = formatter(lower_limit) if lower_limit is not None else "-inf"
             upper_limit_str = formatter(upper_limit) if upper_limit is not None else "inf"
             value_str = formatter(value)
@@ -71,15 +108,11 @@ class RoboScopeLib:
             upper_limit_str = str(upper_limit)
             value_str = str(value)
 
-        lower_limit = float(lower_limit) if lower_limit is not None else float("-inf")
-        upper_limit = float(upper_limit) if upper_limit is not None else float("inf")
-
-        if not lower_limit <= value <= upper_limit:
-            raise AssertionError(
-                f"Numeric check failed: "
-                f"{value_str}{unit} not in [{lower_limit_str}{unit}...{upper_limit_str}{unit}]."
-                f"{error_message}"
-            )
+        raise AssertionError(
+            f"Numeric check failed: "
+            f"{value_str}{unit} not in [{lower_limit_str}{unit}...{upper_limit_str}{unit}]."
+            f"{error_message}"
+        )
 
     @keyword("Check String Measurement")
     def check_string_measurement(
@@ -117,10 +150,8 @@ class RoboScopeLib:
             if value_to_check == expected_to_check:
                 raise AssertionError(f"String check failed: '{value}' == '{expected_value}' (unexpected).{error_message}")
         elif mode == StringComparisonMode.REGEX:
-            import re
-
             flags = re.IGNORECASE if ignore_case else 0
-            if not re.match(expected_value, value, flags=flags):
+            if not _compiled(expected_value, flags).match(value):
                 raise AssertionError(f"String regex check failed: '{value}' does not match '{expected_value}'.{error_message}")
         elif mode == StringComparisonMode.LOG:
             logger.info(f"String log: '{value}' (expected: '{expected_value}')")
@@ -180,9 +211,15 @@ class RoboScopeLib:
 
         error_message = f" {error_message}" if error_message else ""
 
-        for idx, y_value in enumerate(y_data):
-            lower = y_lower_limits[idx] if y_lower_limits and idx < len(y_lower_limits) else float("-inf")
-            upper = y_upper_limits[idx] if y_upper_limits and idx < len(y_upper_limits) else float("inf")
+        # Imported on first use, so only series checks pay for loading (and JIT-compiling) the kernel
+        from roboscope._kernels import first_out_of_bounds
+
+        y = np.asarray(y_data, dtype=np.float64)
+        lower = _limits_array(y_lower_limits, y.size, float("-inf"))
+        upper = _limits_array(y_upper_limits, y.size, float("inf"))
 
-            if not lower <= y_value <= upper:
-                raise AssertionError(f"Series check failed at index {idx}: {y_value} not in [{lower}...{upper}].{error_message}")
+        idx = first_out_of_bounds(y, lower, upper)
+        if idx >= 0:
+            raise AssertionError(
+                f"Series check failed at index {idx}: {y_data[idx]} not in [{lower[idx]}...{upper[idx]}].{error_message}"
+            )
@@ -1,4 +1,4 @@
-from roboscope.database import Database
+from roboscope.database import Database, get_database
 from roboscope.listener import listener
 from roboscope.models import (
     BooleanMeasurement,
@@ -17,6 +17,7 @@ from roboscope.RoboScopeLib import RoboScopeLib
 __all__ = [
     "listener",
     "Database",
+    "get_database",
     "RoboScopeLib",
     "TestRun",
     "TestSuite",
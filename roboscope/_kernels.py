@@ -0,0 +1,35 @@
+"""
+Numeric kernels used by the measurement checks.
+
+The kernels are JIT-compiled with Numba when it is installed (`pip install roboscope[jit]`)
+and fall back to vectorized NumPy otherwise.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _first_out_of_bounds(y: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> int:
+    for i in range(y.shape[0]):
+        if not lower[i] <= y[i] <= upper[i]:
+            return i
+    return -1
+
+
+if njit is not None:
+    first_out_of_bounds = njit(cache=True)(_first_out_of_bounds)
+
+    # Compile (or load from the on-disk cache) on import instead of on the first check
+    first_out_of_bounds(np.zeros(1), np.zeros(1), np.zeros(1))
+else:
+
+    def first_out_of_bounds(y: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> int:
+        """
+        Return the index of the first value outside [lower, upper], or -1 if all values are within bounds.
+        """
+        out_of_bounds = ~((lower <= y) & (y <= upper))  # NaN is out of bounds
+        return int(out_of_bounds.argmax()) if out_of_bounds.any() else -1
@@ -1,37 +1,43 @@
+from collections import defaultdict
+from collections.abc import Callable
 from dataclasses import fields as dataclass_fields
 from datetime import UTC, datetime
 
 from robot.api import logger
-from sqlalchemy import create_engine, func, inspect
+from sqlalchemy import column, create_engine, event, func, insert, inspect, make_url, table
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from roboscope.models import Failure, Record, TestCase, TestRun, TestSuite
 from roboscope.query import QueryBuilder
-from roboscope.schema import generate_database_class
+from roboscope.schema import MsgpackType, generate_database_class
 
 
 class Database:
-    _instance = None
     LOGGER_PREFIX = "[RoboScope DB] "
-
-    def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+    BATCH_SIZE = 500  # Pending rows per table before an automatic flush
+    SQLITE_PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA mmap_size=268435456",
+        "PRAGMA cache_size=-65536",
+    )
 
     def __init__(self, db_url: str = "sqlite:///results.db"):
-        if hasattr(self, "_initialized") and self._initialized:
-            return
-        self._initialized = True
-
-        self.engine = create_engine(db_url)
+        self.engine = self._create_engine(db_url)
         self.Session = sessionmaker(bind=self.engine)
+        self.session = self.Session()  # Long-lived session used for writes
         self.inspector = inspect(self.engine)
 
         self.model_to_db_class = {}
+        self._known_tables: set[str] = set(self.inspector.get_table_names())
+        self._pending: dict[type, list[dict]] = defaultdict(list)
+        self._insert_targets: dict[type, tuple] = {}
+        self._model_builders: dict[tuple[type, type], Callable] = {}
         self._run_id = None
-        self._suite_counter = 0
-        self._test_counter = 0
+        self.current_suite_id = 0
+        self.current_test_id = 0
 
         # Create core tables
         self.initialize_table(TestRun)
@@ -41,6 +47,34 @@ class Database:
 
         logger.debug(f"{self.LOGGER_PREFIX}Database connected: {db_url}")
 
+    @classmethod
+    def _create_engine(cls, db_url: str):
+        """
+        Create the engine for `db_url`.
+
+        SQLite databases are opened with a single persistent connection in WAL mode
+        with synchronous=NORMAL, so commits do not fsync the whole database file.
+        Note that WAL mode keeps `<db>-wal` and `<db>-shm` files next to the database.
+        """
+        if make_url(db_url).get_backend_name() != "sqlite":
+            return create_engine(db_url, insertmanyvalues_page_size=cls.BATCH_SIZE)
+
+        engine = create_engine(
+            db_url,
+            insertmanyvalues_page_size=cls.BATCH_SIZE,
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+        )
+
+        @event.listens_for(engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in cls.SQLITE_PRAGMAS:
+                cursor.execute(pragma)
+            cursor.close()
+
+        return engine
+
     @property
     def run_id(self) -> int:
         if self._run_id is None:
@@ -52,26 +86,21 @@ class Database:
             )
         return self._run_id
 
-    @property
-    def current_suite_id(self) -> int:
-        return self._suite_counter
-
-    @property
-    def current_test_id(self) -> int:
-        return self._test_counter
-
     def check_table_exists(self, model) -> bool:
         if model in self.model_to_db_class:
-            return self.model_to_db_class[model]
+            return True
 
         db_class = generate_database_class(model)
         table_name = db_class.__tablename__
 
-        if not self.inspector.has_table(table_name):
-            return False
-        else:
-            self.model_to_db_class[model] = db_class
-            return True
+        # Tables may have been created by another process since startup
+        if table_name not in self._known_tables:
+            if not self.inspector.has_table(table_name):
+                return False
+            self._known_tables.add(table_name)
+
+        self.model_to_db_class[model] = db_class
+        return True
 
     def initialize_table(self, model) -> type:
         if model in self.model_to_db_class:
@@ -81,8 +110,9 @@ class Database:
         self.model_to_db_class[model] = db_class
 
         table_name = db_class.__tablename__
-        if not self.inspector.has_table(table_name):
+        if table_name not in self._known_tables:
             db_class.__table__.create(bind=self.engine, checkfirst=True)
+            self._known_tables.add(table_name)
             logger.debug(f"{self.LOGGER_PREFIX}Table '{table_name}' created.")
         return db_class
 
@@ -93,27 +123,30 @@ class Database:
             return (result or 0) + 1
 
     def allocate_suite_id(self) -> int:
-        self._suite_counter += 1
-        return self._suite_counter
+        self.current_suite_id += 1
+        return self.current_suite_id
 
     def allocate_test_id(self) -> int:
-        self._test_counter += 1
-        return self._test_counter
+        self.current_test_id += 1
+        return self.current_test_id
 
     def start_new_run(self, run_name: str, run_meta: dict):
         self._run_id = self.allocate_run_id()
-        self._suite_counter = 0
-        self._test_counter = 0
+        self.current_suite_id = 0
+        self.current_test_id = 0
         logger.debug(f"{self.LOGGER_PREFIX}New run started with run_id: {self._run_id}")
 
         new_run = TestRun(run_id=self._run_id, name=run_name, meta=run_meta)
         self.add_record(new_run)
 
     def end_run(self):
+        self.flush()
+
         db_class = self.model_to_db_class[TestRun]
         suite_class = self.model_to_db_class[TestSuite]
 
-        with self.Session() as session:
+        # Closes the long-lived session on exit; it is reopened on next use
+        with self.session as session:
             # 1. Check statuses of all TestSuites for this run
             suite_statuses = session.query(suite_class.status).filter(suite_class.run_id == self._run_id).all()
             suite_statuses = [status[0] for status in suite_statuses]
@@ -165,32 +198,135 @@ class Database:
                 logger.warn(f"{self.LOGGER_PREFIX}No TestRun record found for run_id {self._run_id}.")
 
     def disconnect(self):
+        self.flush()
+        self.session.close()
         logger.debug("{self.LOGGER_PREFIX}Database disconnected.")
         self.engine.dispose()
 
     def add_record(self, record: Record):
-        with self.Session() as session:
-            try:
-                record.run_id = self.run_id
-                db_class = self.model_to_db_class.get(type(record))
+        """
+        Queue a record for insertion.
 
-                if not db_class:
-                    db_class = self.initialize_table(type(record))
+        Records are written in batches: a table is flushed once BATCH_SIZE rows are pending,
+        and everything pending is flushed by `flush()` (called at test/suite boundaries,
+        before queries and when the run ends).
+        """
+        try:
+            record.run_id = self.run_id
+            db_class = self.model_to_db_class.get(type(record))
 
-                db_obj = db_class.from_model(record)
-                session.add(db_obj)
-                session.commit()
-                logger.debug(f"{self.LOGGER_PREFIX}Record added: {record}")
+            if not db_class:
+                db_class = self.initialize_table(type(record))
+
+            data = record.__dict__
+            row = {name: data.get(name) for name in db_class._model_fields}
+            for name, encode in self._insert_target(db_class)[1].items():
+                row[name] = encode(row[name])
 
+            pending = self._pending[db_class]
+            pending.append(row)
+            logger.debug(f"{self.LOGGER_PREFIX}Record queued: {type(record).__name__}")
+
+        except Exception as e:
+            logger.error(f"{self.LOGGER_PREFIX}Error adding record: {e}")
+            return
+
+        if len(pending) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """
+        Write all pending records to the database in a single transaction.
+        """
+        if not self._pending:
+            return
+
+        pending, self._pending = self._pending, defaultdict(list)
+        try:
+            for db_class, rows in pending.items():
+                if rows:
+                    self.session.execute(insert(self._insert_target(db_class)[0]), rows)
+            self.session.commit()
+            logger.debug(f"{self.LOGGER_PREFIX}Flushed {sum(map(len, pending.values()))} record(s).")
+
+        except Exception as e:
+            logger.warn(f"{self.LOGGER_PREFIX}Batch insert failed, retrying per table: {e}")
+            self.session.rollback()
+            for db_class, rows in pending.items():
+                if rows:
+                    self._insert_rows(db_class, rows)
+
+    def _insert_rows(self, db_class, rows: list[dict]):
+        """
+        Insert the rows of one table, falling back to one row at a time if the batch fails,
+        so only the rows that cannot be written are dropped.
+        """
+        statement = insert(self._insert_target(db_class)[0])
+        try:
+            self.session.execute(statement, rows)
+            self.session.commit()
+            return
+        except Exception:
+            self.session.rollback()
+
+        for row in rows:
+            try:
+                self.session.execute(statement, [row])
+                self.session.commit()
             except Exception as e:
-                logger.error(f"{self.LOGGER_PREFIX}Error adding record: {e}")
-                session.rollback()
+                logger.error(f"{self.LOGGER_PREFIX}Error adding record to '{db_class.__tablename__}': {e}")
+                self.session.rollback()
+
+    def _insert_target(self, db_class) -> tuple:
+        """
+        Return the table to insert `db_class` rows into and the encoders for its list/dict columns.
+
+        List and dict values are encoded when a record is queued, so pending rows hold a snapshot
+        of the caller's lists and dicts. The returned table declares those columns without a type,
+        so the encoded values are sent as they are.
+        """
+        target = self._insert_targets.get(db_class)
+        if target is None:
+            dialect = self.engine.dialect
+            columns, encoders = [], {}
+            for c in db_class.__table__.columns:
+                if c.primary_key:
+                    continue
+                encoder = None
+                if isinstance(c.type, MsgpackType):
+                    encoder = c.type.dialect_impl(dialect).bind_processor(dialect)
+                if encoder:
+                    encoders[c.name] = encoder
+                    columns.append(column(c.name))
+                else:
+                    columns.append(column(c.name, c.type))
+            target = self._insert_targets[db_class] = (table(db_class.__tablename__, *columns), encoders)
+        return target
+
+    def _model_builder(self, model_class, db_class=None) -> Callable:
+        """
+        Return a function converting a `db_class` row into a `model_class` instance.
+
+        The function is generated once per (db_class, model_class) pair, with the dataclass fields that
+        have a matching column passed as keyword arguments, e.g. `model_class(name=obj.name, value=obj.value)`.
+        `db_class` defaults to the table class registered for `model_class`.
+        """
+        db_class = db_class or self.model_to_db_class[model_class]
+        key = (db_class, model_class)
+
+        builder = self._model_builders.get(key)
+        if builder is None:
+            column_names = frozenset(db_class.__table__.columns.keys())
+            field_names = tuple(f.name for f in dataclass_fields(model_class) if f.name in column_names)
+            arguments = ", ".join(f"{name}=obj.{name}" for name in field_names)
+
+            namespace = {"model_class": model_class}
+            exec(f"def build(obj):\n    return model_class({arguments})\n", namespace)  # noqa: S102
+            builder = self._model_builders[key] = namespace["build"]
+        return builder
 
     def _db_to_model(self, db_obj, model_class):
-        model_field_names = {f.name for f in dataclass_fields(model_class)}
-        db_data = {column.name: getattr(db_obj, column.name) for column in db_obj.__table__.columns}
-        filtered_data = {k: v for k, v in db_data.items() if k in model_field_names}
-        return model_class(**filtered_data)
+        return self._model_builder(model_class, type(db_obj))(db_obj)
 
     def query(self, model) -> QueryBuilder:
         """
@@ -202,4 +338,21 @@ class Database:
         if not self.check_table_exists(model):
             raise ValueError(f"Model '{model.__name__}' does not exist in the database.")
 
+        self.flush()
         return QueryBuilder(self, model)
+
+
+_instances: dict[str, Database] = {}
+
+
+def get_database(db_url: str = "sqlite:///results.db") -> Database:
+    """
+    Return the shared Database for `db_url`, connecting on first use.
+
+    :param db_url: Database URL (e.g., "sqlite:///results.db", "postgresql://...")
+    :return: Database instance
+    """
+    db = _instances.get(db_url)
+    if db is None:
+        db = _instances[db_url] = Database(db_url)
+    return db
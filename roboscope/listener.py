@@ -1,4 +1,3 @@
-from collections.abc import Mapping
 from datetime import timedelta
 
 from robot import result, running
@@ -6,7 +5,7 @@ from robot.api import logger
 from robot.api.interfaces import ListenerV3
 from robot.libraries.BuiltIn import BuiltIn
 
-from roboscope.database import Database
+from roboscope.database import get_database
 from roboscope.models import Failure, TestCase, TestSuite
 
 
@@ -28,7 +27,7 @@ class listener(ListenerV3):  # noqa: N801
         test_run_name = BuiltIn().get_variable_value("${RBS_RUN_NAME}", default="RoboScope Test")
         test_run_meta = BuiltIn().get_variable_value("${RBS_RUN_META}", default="")  # Format: "key1=value1,key2=value2"
 
-        self.db = Database(db_url=db_url)
+        self.db = get_database(db_url)
         self.db.start_new_run(
             run_name=test_run_name,
             run_meta=self._extract_run_metadata(test_run_meta),
@@ -74,9 +73,7 @@ class listener(ListenerV3):  # noqa: N801
 
         logger.info(f"{self.LOGGER_PREFIX}Ending suite '{suite_data}' (suite_id: {suite_id})")
 
-        metadata_dict = {}
-        if hasattr(result, "metadata") and isinstance(result.metadata, Mapping):
-            metadata_dict = dict(result.metadata)
+        metadata_dict = dict(result.metadata) if result.metadata else {}
         logger.info(f"{self.LOGGER_PREFIX}Parsed suite metadata: {metadata_dict}")
 
         # Record suite event
@@ -85,13 +82,14 @@ class listener(ListenerV3):  # noqa: N801
                 suite_id=suite_id,
                 parent_suite_id=parent_suite_id,
                 meta=metadata_dict,
-                name=getattr(result, "name", ""),
-                start_time=getattr(result, "start_time", None),
-                end_time=getattr(result, "end_time", None),
-                elapsed_time=self._timedelta_to_seconds(result.elapsed_time) if hasattr(result, "elapsed_time") else None,
-                status=getattr(result, "status", ""),
+                name=result.name,
+                start_time=result.start_time,
+                end_time=result.end_time,
+                elapsed_time=self._timedelta_to_seconds(result.elapsed_time),
+                status=result.status,
             )
         )
+        self.db.flush()
 
     def start_test(self, data: running.TestCase, result: running.TestCase):
         # Allocate test_id
@@ -105,32 +103,34 @@ class listener(ListenerV3):  # noqa: N801
 
     def end_test(self, data: running.TestCase, result: running.TestCase):
         suite_id = self.suite_stack[-1][0] if self.suite_stack else None
+        test_id = self.current_test_id
 
-        logger.info(f"{self.LOGGER_PREFIX}Ending test '{data.name}' (test_id: {self.current_test_id}, suite_id: {suite_id})")
+        logger.info(f"{self.LOGGER_PREFIX}Ending test '{data.name}' (test_id: {test_id}, suite_id: {suite_id})")
 
-        tags_list = list(getattr(result, "tags", []))
+        tags_list = list(result.tags)
         logger.info(f"{self.LOGGER_PREFIX}Test case '{data.name}' tags: {tags_list}")
 
         # Record test case event
         self.db.add_record(
             TestCase(
                 suite_id=suite_id,
-                test_id=self.current_test_id,
+                test_id=test_id,
                 tags=tags_list,
-                name=getattr(result, "name", ""),
-                start_time=getattr(result, "start_time", None),
-                end_time=getattr(result, "end_time", None),
-                elapsed_time=self._timedelta_to_seconds(result.elapsed_time) if hasattr(result, "elapsed_time") else None,
-                status=getattr(result, "status", ""),
+                name=result.name,
+                start_time=result.start_time,
+                end_time=result.end_time,
+                elapsed_time=self._timedelta_to_seconds(result.elapsed_time),
+                status=result.status,
             )
         )
+        self.db.flush()
 
         # Reset test tracking
         self.current_test_id = None
 
     def end_keyword(self, data: running.Keyword, result: result.Keyword):
         # Record failure if keyword has failed
-        if hasattr(result, "status") and result.status != "FAIL":
+        if result.status != "FAIL":
             return
 
         suite_id = self.suite_stack[-1][0] if self.suite_stack else None
@@ -142,9 +142,9 @@ class listener(ListenerV3):  # noqa: N801
             Failure(
                 suite_id=suite_id,
                 test_id=test_id,
-                source=getattr(result, "name", ""),
-                details=getattr(result, "message", ""),
-                timestamp=getattr(result, "end_time", None),
+                source=result.name,
+                details=result.message,
+                timestamp=result.end_time,
             )
         )
 
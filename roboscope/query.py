@@ -1,3 +1,5 @@
+from collections.abc import Iterator
+from dataclasses import fields as dataclass_fields
 from typing import TYPE_CHECKING, Any, Self
 
 from sqlalchemy import func
@@ -11,7 +13,9 @@ class QueryBuilder:
         self.db = db
         self.model = model
         self.db_class = db.model_to_db_class[model]
-        self.query = db.Session().query(self.db_class)
+        # Closed after each terminal method (all, first, count, ...); it reopens on next use
+        self.session = db.Session()
+        self.query = self.session.query(self.db_class)
 
     def where(self, **kwargs) -> Self:
         for attr, value in kwargs.items():
@@ -33,13 +37,24 @@ class QueryBuilder:
         self.query = self.query.order_by(sort_column.desc() if order == "desc" else sort_column.asc())
         return self
 
+    def iter(self, chunk_size: int = 1000) -> Iterator:
+        """
+        Iterate over the query results, fetching `chunk_size` rows at a time.
+
+        Prefer this over `all()` for large result sets, as only one chunk is held in memory.
+        """
+        build = self.db._model_builder(self.model)
+        with self.session:
+            for obj in self.query.execution_options(stream_results=True).yield_per(chunk_size):
+                yield build(obj)
+
     def all(self) -> list:
-        results = self.query.all()
-        return [self.db._db_to_model(obj, self.model) for obj in results]
+        return list(self.iter())
 
     def first(self) -> Any | None:
-        result = self.query.first()
-        return self.db._db_to_model(result, self.model) if result else None
+        with self.session:
+            result = self.query.first()
+            return self.db._db_to_model(result, self.model) if result else None
 
     def limit(self, limit: int) -> Self:
         self.query = self.query.limit(limit)
@@ -52,18 +67,20 @@ class QueryBuilder:
     def values(self, *fields) -> list:
         if not all(hasattr(self.db_class, field) for field in fields):
             raise ValueError("One or more fields are invalid.")
-        results = self.db.Session().query(*(getattr(self.db_class, f) for f in fields)).all()
-        return results
+        with self.session:
+            return self.query.with_entities(*(getattr(self.db_class, f) for f in fields)).all()
 
     def max(self, field) -> Any:
         if not hasattr(self.db_class, field):
             raise ValueError(f"'{field}' is not a valid attribute of {self.model.__name__}")
-        return self.query.with_entities(func.max(getattr(self.db_class, field))).scalar()
+        with self.session:
+            return self.query.with_entities(func.max(getattr(self.db_class, field))).scalar()
 
     def min(self, field) -> Any:
         if not hasattr(self.db_class, field):
             raise ValueError(f"'{field}' is not a valid attribute of {self.model.__name__}")
-        return self.query.with_entities(func.min(getattr(self.db_class, field))).scalar()
+        with self.session:
+            return self.query.with_entities(func.min(getattr(self.db_class, field))).scalar()
 
     def where_in(self, field, values) -> Self:
         if not hasattr(self.db_class, field):
@@ -84,7 +101,8 @@ class QueryBuilder:
         return self
 
     def count(self) -> int:
-        return self.query.count()
+        with self.session:
+            return self.query.count()
 
     def explain(self) -> Self:
         # Print the raw SQL query
@@ -94,13 +112,11 @@ class QueryBuilder:
     def as_dataframe(self) -> Any:
         """
         Convert the query results to a pandas DataFrame.
+
+        The DataFrame is built directly from the SELECT, with one column per model field.
         """
         import pandas as pd
 
-        results = self.all()
-        if not results:
-            return pd.DataFrame()
-
-        # Convert list of dataclass instances to list of dictionaries
-        data = [record.__dict__ for record in results]
-        return pd.DataFrame(data)
+        columns = (getattr(self.db_class, f.name) for f in dataclass_fields(self.model) if hasattr(self.db_class, f.name))
+        statement = self.query.with_entities(*columns).statement
+        return pd.read_sql_query(statement, self.db.engine)
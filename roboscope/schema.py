@@ -1,12 +1,53 @@
+import json
 import re
+import types
+import typing
 from dataclasses import fields, is_dataclass
 from datetime import datetime
+from functools import lru_cache
 
-from sqlalchemy import JSON, Column, DateTime, Float, Integer, String
+import msgpack
+from sqlalchemy import JSON, Column, DateTime, Float, Integer, LargeBinary, String
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.types import TypeDecorator
 
 Base = declarative_base()
 
+_CAMEL_WORD = re.compile(r"(.)([A-Z][a-z]+)")
+_CAMEL_BOUNDARY = re.compile(r"([a-z0-9])([A-Z])")
+
+# Generated database classes by dataclass type; each class is mapped on Base only once
+_CLASS_CACHE: dict[type, type] = {}
+
+
+class MsgpackType(TypeDecorator):
+    """
+    Store lists and dicts as MessagePack-encoded binary on SQLite, and as JSON on other databases.
+
+    Values written by older versions as JSON text are still decoded on read.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        # Keep JSON on SQL servers such as PostgreSQL, where existing tables use json columns
+        if dialect.name != "sqlite":
+            return dialect.type_descriptor(JSON())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != "sqlite":
+            return value
+        return msgpack.packb(value)
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, str):
+            return json.loads(value)
+        if not isinstance(value, bytes | bytearray | memoryview):
+            return value  # Already decoded by the JSON implementation
+        return msgpack.unpackb(value, strict_map_key=False)
+
 
 sqlalchemy_type_mapping = {
     bool: Integer,
@@ -14,17 +55,32 @@ sqlalchemy_type_mapping = {
     int: Integer,
     str: String,
     datetime: DateTime,
-    list: JSON,
-    dict: JSON,
+    list: MsgpackType,
+    dict: MsgpackType,
 }
 
 
+@lru_cache(maxsize=None)
 def camel_to_snake(name: str) -> str:
     """
     Convert CamelCase to snake_case
     """
-    s1 = re.sub(r"(.)([A-Z][a-z]+)", r"\1_\2", name)
-    return re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", s1).lower()
+    return _CAMEL_BOUNDARY.sub(r"\1_\2", _CAMEL_WORD.sub(r"\1_\2", name)).lower()
+
+
+def _resolve_field_type(annotation):
+    """
+    Reduce a resolved field annotation to the plain type used for column mapping.
+
+    Optional types (`float | None`, `Optional[float]`) map to their non-None member and
+    parametrized generics (`list[float]`, `dict[str, str]`) map to their origin type.
+    """
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        members = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(members) == 1:
+            annotation = members[0]
+
+    return typing.get_origin(annotation) or annotation
 
 
 def generate_database_class(dataclass_type: type):
@@ -39,8 +95,12 @@ def generate_database_class(dataclass_type: type):
         ValueError: If the dataclass contains unsupported field types.
 
     Returns:
-        A new SQLAlchemy model class with the same fields as the dataclass.
+        A SQLAlchemy model class with the same fields as the dataclass.
+        The class is generated once per dataclass and reused on subsequent calls.
     """
+    if dataclass_type in _CLASS_CACHE:
+        return _CLASS_CACHE[dataclass_type]
+
     if not is_dataclass(dataclass_type):
         raise TypeError(f"{dataclass_type.__name__} is not a dataclass")
 
@@ -48,21 +108,22 @@ def generate_database_class(dataclass_type: type):
 
     attrs = {
         "__tablename__": table_name,
+        "_model_fields": tuple(f.name for f in fields(dataclass_type)),  # Columns filled from a record
         "id": Column(Integer, primary_key=True),
     }
 
+    # Resolves string annotations (e.g. from `from __future__ import annotations`)
+    type_hints = typing.get_type_hints(dataclass_type)
+
     for f in fields(dataclass_type):
+        field_type = _resolve_field_type(type_hints.get(f.name, f.type))
         if f.name == "run_id":
             attrs[f.name] = Column(Integer)
-        elif f.type in sqlalchemy_type_mapping:
-            attrs[f.name] = Column(sqlalchemy_type_mapping[f.type])
+        elif field_type in sqlalchemy_type_mapping:
+            attrs[f.name] = Column(sqlalchemy_type_mapping[field_type])
         else:
             raise ValueError(f"Unsupported field type: {f.name} {f.type}")
 
-    @classmethod
-    def from_model(cls, model):
-        return cls(**model.__dict__)
-
-    attrs["from_model"] = from_model
-
-    return type(dataclass_type.__name__ + "DB", (Base,), attrs)
+    db_class = type(dataclass_type.__name__ + "DB", (Base,), attrs)
+    _CLASS_CACHE[dataclass_type] = db_class
+    return db_class